@@ -7,8 +7,113 @@ DISTANCE_COLUMN = "distance"
 LATITUDE_COLUMN = "latitude"
 LONGITUDE_COLUMN = "longitude"
 
+import math
+from typing import Dict, Iterable, List, Tuple, Union
+
 import numpy as np
 import pandas as pd
+from numba import float32, float64, njit, prange, types, vectorize
+from numba.extending import overload
+
+# Below this many points, thread start-up costs more than the parallel kernel saves.
+_PARALLEL_MIN_SIZE = 10_000
+
+# Fast-math without the no-NaN/no-inf assumptions, so NaN coordinates still give NaN.
+_FASTMATH = {"nsz", "arcp", "contract", "afn", "reassoc"}
+
+
+def _as_float_of(value, like):
+    """Cast value to the floating point type of like."""
+    return type(like)(value)
+
+
+@overload(_as_float_of)
+def _as_float_of_overload(value, like):
+    # Resolved at compile time, so float32 kernels get float32 constants.
+    if like == types.float32:
+        return lambda value, like: np.float32(value)
+    return lambda value, like: np.float64(value)
+
+
+@njit(fastmath=_FASTMATH, cache=True)
+def _haversine_angle(lat1, lon1, lat2, lon2):
+    """Haversine central angle (radians) between two points given in degrees.
+
+    All constants match the input type, so float32 inputs are computed in float32.
+    """
+    one = _as_float_of(1.0, lat1)
+    half = _as_float_of(0.5, lat1)
+    to_radians = _as_float_of(math.pi / 180.0, lat1)
+
+    lat1 = lat1 * to_radians
+    lat2 = lat2 * to_radians
+    sin_dlat = math.sin((lat2 - lat1) * half)
+    sin_dlon = math.sin((lon2 - lon1) * to_radians * half)
+
+    a = sin_dlat * sin_dlat + math.cos(lat1) * math.cos(lat2) * sin_dlon * sin_dlon
+    # Clamp rounding overshoots; a NaN comparison is false, so NaN propagates.
+    if a > one:
+        a = one
+    return (one + one) * math.asin(math.sqrt(a))
+
+
+@vectorize(
+    [
+        float32(float32, float32, float32, float32),
+        float64(float64, float64, float64, float64),
+    ],
+    nopython=True,
+    fastmath=_FASTMATH,
+    cache=True,
+)
+def _central_angle(lat1, lon1, lat2, lon2):
+    return _haversine_angle(lat1, lon1, lat2, lon2)
+
+
+@njit(parallel=True, fastmath=_FASTMATH, cache=True)
+def _haversine_parallel(lat, lon, lat_point, lon_point, radius, out):
+    for i in prange(lat.shape[0]):
+        out[i] = radius * _haversine_angle(lat[i], lon[i], lat_point, lon_point)
+
+
+# No fast-math on the comparison kernels: NaN angles must compare as false.
+@njit(cache=True)
+def _within_angle(lat, lon, lat_point, lon_point, max_angle, out):
+    for i in range(lat.shape[0]):
+        out[i] = _haversine_angle(lat[i], lon[i], lat_point, lon_point) <= max_angle
+
+
+@njit(cache=True)
+def _min_angle(lat, lon, refs_lat, refs_lon, out):
+    for i in range(lat.shape[0]):
+        # NaN angles never compare lower, so NaN reference points are skipped.
+        best = np.inf
+        for j in range(refs_lat.shape[0]):
+            angle = _haversine_angle(lat[i], lon[i], refs_lat[j], refs_lon[j])
+            if angle < best:
+                best = angle
+        out[i] = best if best < np.inf else np.nan
+
+
+@njit(cache=True)
+def _event_payouts(distances, magnitudes, radii, min_magnitudes, rule_payouts, out):
+    # Rules are sorted by decreasing payout, so the first match is the best one.
+    for i in range(distances.shape[0]):
+        best = 0.0
+        for j in range(radii.shape[0]):
+            if distances[i] <= radii[j] and magnitudes[i] >= min_magnitudes[j]:
+                if rule_payouts[j] > best:
+                    best = rule_payouts[j]
+                break
+        out[i] = best
+
+
+def _as_coordinates(lat_series: Iterable[float], lon_series: Iterable[float]) -> Tuple[np.ndarray, np.ndarray]:
+    lat_arr = np.ascontiguousarray(lat_series, dtype=np.float64).ravel()
+    lon_arr = np.ascontiguousarray(lon_series, dtype=np.float64).ravel()
+    if lat_arr.shape != lon_arr.shape:
+        raise ValueError("latitudes and longitudes must have the same length")
+    return lat_arr, lon_arr
 
 
 def get_haversine_distance(
@@ -16,6 +121,7 @@ def get_haversine_distance(
     lon_series: Iterable[float],
     lat_point: float,
     lon_point: float,
+    dtype: np.dtype = np.float64,
 ) -> np.ndarray:
     """
     Compute the haversine distance between a collection of
@@ -31,6 +137,10 @@ def get_haversine_distance(
         Latitude of the reference point (degrees).
     lon_point : float
         Longitude of the reference point (degrees).
+    dtype : np.dtype, default np.float64
+        Floating point precision of the computation. With ``np.float32`` the
+        whole kernel runs in single precision: half the memory traffic, twice
+        the SIMD lanes, and still accurate to a few meters.
 
     Returns
     -------
@@ -38,24 +148,155 @@ def get_haversine_distance(
         Distance from each (lat,lon) pair to the reference point, expressed in km.
     """
 
-    lat_arr = np.asarray(lat_series, dtype=np.float64)
-    lon_arr = np.asarray(lon_series, dtype=np.float64)
+    dtype = np.dtype(dtype)
+    if dtype not in (np.float32, np.float64):
+        raise ValueError(f"dtype must be float32 or float64, got {dtype}")
+
+    lat_arr = np.asarray(lat_series, dtype=dtype)
+    lon_arr = np.asarray(lon_series, dtype=dtype)
+
+    # Cast every operand so that nothing promotes the result back to float64.
+    lat_point = dtype.type(lat_point)
+    lon_point = dtype.type(lon_point)
+    earth_radius = dtype.type(EARTH_RADIUS)
+
+    scalar_point = np.ndim(lat_point) == np.ndim(lon_point) == 0
+    if lat_arr.size >= _PARALLEL_MIN_SIZE and lat_arr.shape == lon_arr.shape and scalar_point:
+        # Large catalogs: split the loop across threads.
+        distances = np.empty(lat_arr.shape, dtype=dtype)
+        _haversine_parallel(
+            np.ascontiguousarray(lat_arr).ravel(),
+            np.ascontiguousarray(lon_arr).ravel(),
+            lat_point,
+            lon_point,
+            earth_radius,
+            distances.ravel(),
+        )
+    else:
+        # The whole formula runs in a single compiled pass, without temporaries.
+        distances = earth_radius * _central_angle(lat_arr, lon_arr, lat_point, lon_point)
+
+    return distances
+    
+
 
-    lat1 = np.radians(lat_arr)          # points from the dataset
-    lon1 = np.radians(lon_arr)
-    lat2 = np.radians(lat_point)        # reference point
-    lon2 = np.radians(lon_point)
+def get_haversine_within(
+    lat_series: Iterable[float],
+    lon_series: Iterable[float],
+    lat_point: float,
+    lon_point: float,
+    max_radius_km: float,
+) -> np.ndarray:
+    """
+    Check which locations lie within a given radius of a reference point.
 
-    # Apply the haversine formula (vectorised).
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
+    The comparison is done inside the distance kernel, so no distance array
+    is ever allocated.
 
-    a = np.sin(dlat / 2.0) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2.0) ** 2
-    c = 2.0 * np.arctan2(np.sqrt(a), np.sqrt(1.0 - a))
-    distances = EARTH_RADIUS * c
+    Parameters
+    ----------
+    lat_series : pandas.Series or array‑like
+        Latitudes of the locations (degrees).
+    lon_series : pandas.Series or array‑like
+        Longitudes of the locations (degrees).
+    lat_point : float
+        Latitude of the reference point (degrees).
+    lon_point : float
+        Longitude of the reference point (degrees).
+    max_radius_km : float
+        Radius around the reference point, in km.
 
-    return distances
-    
+    Returns
+    -------
+    np.ndarray
+        Boolean mask, True where the location is at most max_radius_km away.
+        Locations with NaN coordinates are False.
+    """
+
+    lat_arr, lon_arr = _as_coordinates(lat_series, lon_series)
+
+    within = np.empty(lat_arr.shape, dtype=np.bool_)
+    _within_angle(lat_arr, lon_arr, float(lat_point), float(lon_point), max_radius_km / EARTH_RADIUS, within)
+
+    return within
+
+
+def min_haversine_to_any(
+    points_lat: Iterable[float],
+    points_lon: Iterable[float],
+    refs_lat: Iterable[float],
+    refs_lon: Iterable[float],
+) -> np.ndarray:
+    """
+    Compute, for each location, the haversine distance to the closest
+    reference point.
+
+    The minimum is kept while iterating over the reference points, so the
+    full pairwise distance matrix is never allocated.
+
+    Parameters
+    ----------
+    points_lat : pandas.Series or array‑like
+        Latitudes of the locations (degrees).
+    points_lon : pandas.Series or array‑like
+        Longitudes of the locations (degrees).
+    refs_lat : pandas.Series or array‑like
+        Latitudes of the reference points (degrees).
+    refs_lon : pandas.Series or array‑like
+        Longitudes of the reference points (degrees).
+
+    Returns
+    -------
+    np.ndarray
+        Distance from each location to its closest reference point, in km.
+        Reference points with NaN coordinates are ignored; NaN locations give NaN.
+    """
+
+    lat_arr, lon_arr = _as_coordinates(points_lat, points_lon)
+    refs_lat_arr, refs_lon_arr = _as_coordinates(refs_lat, refs_lon)
+    if refs_lat_arr.size == 0:
+        raise ValueError("at least one reference point is required")
+
+    min_angles = np.empty(lat_arr.shape, dtype=np.float64)
+    _min_angle(lat_arr, lon_arr, refs_lat_arr, refs_lon_arr, min_angles)
+
+    return EARTH_RADIUS * min_angles
+
+
+class HaversineIndex:
+    """
+    Haversine distances from a fixed set of locations to many reference points.
+
+    The radians conversion and cos(latitude) of the locations are computed once
+    at construction, so each distance_to call only does the work depending on
+    the reference point.
+
+    Parameters
+    ----------
+    lat_series : pandas.Series or array‑like
+        Latitudes of the locations (degrees).
+    lon_series : pandas.Series or array‑like
+        Longitudes of the locations (degrees).
+    """
+
+    def __init__(self, lat_series: Iterable[float], lon_series: Iterable[float]):
+        lat_arr, lon_arr = _as_coordinates(lat_series, lon_series)
+        self.lat = np.radians(lat_arr)
+        self.lon = np.radians(lon_arr)
+        self.cos_lat = np.cos(self.lat)
+
+    def distance_to(self, lat_point: float, lon_point: float) -> np.ndarray:
+        """
+        Distance from each location to the reference point, in km.
+        """
+        lat2 = math.radians(lat_point)
+        lon2 = math.radians(lon_point)
+
+        a = (
+            np.sin((lat2 - self.lat) / 2.0) ** 2
+            + self.cos_lat * math.cos(lat2) * np.sin((lon2 - self.lon) / 2.0) ** 2
+        )
+        return 2.0 * EARTH_RADIUS * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
 
 
 def compute_payouts(
@@ -82,34 +323,44 @@ def compute_payouts(
         Mapping of "year" → "max payout" for that year.
     """
 
-    earthquake_data_copy = earthquake_data.copy()
+    # Only the time column may need converting, so the frame itself is never copied.
+    times = earthquake_data[TIME_COLUMN]
 
     # We need to verify that column time is in datetime format
-    if not pd.api.types.is_datetime64_any_dtype(earthquake_data_copy["time"]):
-        earthquake_data_copy["time"] = pd.to_datetime(earthquake_data_copy["time"], errors="coerce")
+    if not pd.api.types.is_datetime64_any_dtype(times):
+        times = pd.to_datetime(times, errors="coerce", cache=True)
 
-    earthquake_data_copy = earthquake_data_copy.dropna(subset=["time"])
+    valid = times.notna().to_numpy()
+    if not valid.any():
+        return {}
 
-    def compute_payout(row) -> float:
-        payouts = [
-            rule["payout"]
-            for rule in payout_rules
-            if row[DISTANCE_COLUMN] <= rule["radius"]
-            and row["mag"] >= rule["magnitude"]
-        ]
-        return max(payouts) if payouts else 0.0
+    distances = earthquake_data[DISTANCE_COLUMN].to_numpy(dtype=np.float64)[valid]
+    magnitudes = earthquake_data[MAGNITUDE_COLUMN].to_numpy(dtype=np.float64)[valid]
+    sorted_rules = sorted(payout_rules, key=lambda rule: -rule["payout"])
+    radii = np.fromiter((rule["radius"] for rule in sorted_rules), dtype=np.float64)
+    min_magnitudes = np.fromiter((rule["magnitude"] for rule in sorted_rules), dtype=np.float64)
+    rule_payouts = np.fromiter((rule["payout"] for rule in sorted_rules), dtype=np.float64)
 
-    earthquake_data_copy["payout"] = earthquake_data_copy.apply(compute_payout, axis=1)
-    earthquake_data_copy["year"] = earthquake_data_copy["time"].dt.year
+    # Compiled loop over events: no (events x rules) temporaries, no per-row Python.
+    event_payouts = np.empty(distances.shape, dtype=np.float64)
+    _event_payouts(distances, magnitudes, radii, min_magnitudes, rule_payouts, event_payouts)
 
-    yearly_totals = earthquake_data_copy.groupby("year")["payout"].max()
+    # Yearly max on a dense array indexed by the offset from the first year.
+    years = times.dt.year.to_numpy()[valid].astype(np.int64)
+    first_year = years.min()
+    offsets = years - first_year
 
-    return yearly_totals.to_dict()
+    yearly_max = np.zeros(years.max() - first_year + 1, dtype=np.float64)
+    np.maximum.at(yearly_max, offsets, event_payouts)
+    observed = np.zeros(yearly_max.size, dtype=bool)
+    observed[offsets] = True
+
+    return {int(first_year + offset): float(yearly_max[offset]) for offset in np.flatnonzero(observed)}
 
 
 
 def compute_burning_cost(
-    payouts: Dict[int, float], 
+    payouts: Union[Dict[int, float], Tuple[np.ndarray, int]], 
     start_year: float, 
     end_year: float,
 ) -> float :
@@ -119,9 +370,10 @@ def compute_burning_cost(
 
     Parameters
     ----------
-    payouts: dict[int, float]
+    payouts: dict[int, float] or tuple[np.ndarray, int]
         The percentage of payout associated with that year. If a year is not present, 
-        its payout is 0.
+        its payout is 0. Can also be given as a dense array of yearly payouts
+        together with the year of its first element.
     start_year: float
         Start year of the period to be analyzed.
     end_year: float
@@ -130,16 +382,23 @@ def compute_burning_cost(
     Returns
     ------
     float
-        The average cost. Returns 0 if the period does not include any years.
+        The average cost over the period.
     """
     
     if start_year > end_year:
         raise ValueError("start_year must be less than or equal to end_year")
 
     total_years = end_year - start_year + 1
-    if total_years == 0:
-        return 0.0
-
-    total_pct = sum(payouts.get(year, 0.0) for year in range(start_year, end_year + 1))
 
-    return total_pct / total_years
\ No newline at end of file
+    if isinstance(payouts, tuple):
+        yearly_payouts, first_year = payouts
+        yearly_payouts = np.asarray(yearly_payouts, dtype=np.float64)
+        start = max(int(start_year - first_year), 0)
+        stop = max(int(end_year - first_year + 1), 0)
+        total_pct = yearly_payouts[start:stop].sum()
+    else:
+        years = np.fromiter(payouts.keys(), dtype=np.float64, count=len(payouts))
+        values = np.fromiter(payouts.values(), dtype=np.float64, count=len(payouts))
+        total_pct = values[(years >= start_year) & (years <= end_year)].sum()
+
+    return float(total_pct) / total_years
@@ -2,15 +2,50 @@
 Utilities for querying the USGS Earthquake API.
 """
 
-import json
+import functools
+import time
 import urllib.error
 import urllib.parse
 import urllib.request
 from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
 import pandas as pd
 import asyncio
 import aiohttp
 
+try:
+    # Parses the raw bytes directly, several times faster than the stdlib.
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+try:
+    # Streams the features one at a time. Only worth it with a compiled
+    # backend: the pure Python one is about 10x slower than orjson.
+    import ijson
+    if ijson.backend not in ("yajl2_c", "yajl2_cffi"):
+        ijson = None
+except ImportError:
+    ijson = None
+
+# Parsed responses of get_earthquake_data are reused for at most this long.
+CACHE_TTL_SECONDS = 3600
+CACHE_MAX_ENTRIES = 128
+
+# Properties of a USGS feature kept in the returned DataFrame.
+PROPERTY_COLUMNS = [
+    "time", "mag", "magType", "nst", "gap", "dmin", "rms", "net", "updated",
+    "place", "type", "horizontalError", "depthError", "magError", "magNst",
+    "status", "locationSource", "magSource",
+]
+
+# Columns of the returned DataFrame, in order.
+EARTHQUAKE_COLUMNS = [
+    "time", "latitude", "longitude", "depth", "mag", "magType", "nst", "gap",
+    "dmin", "rms", "net", "id", "updated", "place", "type", "horizontalError",
+    "depthError", "magError", "magNst", "status", "locationSource", "magSource",
+]
 
 
 def build_api_url(
@@ -39,11 +74,69 @@ def build_api_url(
         url for API
     """
     
+    starttime_str, endtime_str = _format_query_window(endtime)
+    return _format_api_url(assets, starttime_str, endtime_str, minimum_magnitude, radius)
+
+
+
+def build_api_urls(
+    assets: Iterable[Tuple[float, float]],
+    endtime: datetime,
+    minimum_magnitude: float,
+    radius: float,
+) -> List[str]:
+    """
+    Return the USGS query URLs for several latitude/longitude pairs sharing
+    the same period, magnitude threshold and radius.
+
+    The dates are formatted once for the whole batch.
+
+    Parameters
+    ----------
+    assets : Iterable[Tuple[float, float]]
+        Latitude and longitude of the assets.
+    endtime : datetime
+        Maximum date in YYYY-MM-DD format.
+    minimum_magnitude : float
+        Magnitude threshold.
+    radius : float
+        Search radius in kilometers.
+
+    Returns
+    -------
+    List[str]
+        url for API, one per asset
+    """
+
+    starttime_str, endtime_str = _format_query_window(endtime)
+    return [
+        _format_api_url(loc, starttime_str, endtime_str, minimum_magnitude, radius)
+        for loc in assets
+    ]
+
+
+
+def _format_query_window(endtime: datetime) -> Tuple[str, str]:
+    """
+    Return the start and end dates (YYYY-MM-DD) of the 200 year query window.
+    """
+    starttime = endtime - timedelta(days=200 * 365)
+    return starttime.strftime("%Y-%m-%d"), endtime.strftime("%Y-%m-%d")
+
+
+
+def _format_api_url(
+    assets: Tuple[float, float],
+    starttime: str,
+    endtime: str,
+    minimum_magnitude: float,
+    radius: float,
+) -> str:
     lat, lon = assets
     base = "https://earthquake.usgs.gov/fdsnws/event/1/query"
     params = (
-        f"?format=geojson&starttime={(endtime- timedelta(days=200 * 365)).strftime("%Y-%m-%d")}"
-        f"&endtime={endtime.strftime("%Y-%m-%d")}"
+        f"?format=geojson&starttime={starttime}"
+        f"&endtime={endtime}"
         f"&latitude={lat}&longitude={lon}"
         f"&minmagnitude={minimum_magnitude}&maxradiuskm={radius}"
     )
@@ -51,6 +144,166 @@ def build_api_url(
 
 
 
+def _format_timestamps(epoch_ms: pd.Series) -> pd.Series:
+    """
+    Render epoch milliseconds as ISO 8601 strings with millisecond precision
+    (e.g. "2021-10-12T09:24:05.099Z"), one column at a time. Missing values stay NaN.
+    """
+    timestamps = pd.to_datetime(epoch_ms, unit="ms", utc=True).dt.round("ms")
+    return timestamps.dt.strftime("%Y-%m-%dT%H:%M:%S.%f").str[:-3] + "Z"
+
+
+
+def _parse_features(data: dict) -> pd.DataFrame:
+    """
+    Convert a USGS geojson response into a DataFrame of earthquakes sorted by
+    date in descending order (see get_earthquake_data for the columns).
+    """
+    return pd.DataFrame(_parse_columns(data))
+
+
+
+def _parse_columns(data: dict) -> Dict[str, np.ndarray]:
+    """
+    Convert a USGS geojson response into one array per column, sorted by
+    date in descending order. Returns an empty dict when there is no event.
+    """
+    columns = _ColumnBuilder()
+    for feat in data.get("features", []):
+        columns.append(feat)
+    return columns.build()
+
+
+
+class _ColumnBuilder:
+    """
+    Accumulate USGS features one at a time into one list per column
+    (structure of arrays), so they can be consumed from a stream.
+    """
+
+    def __init__(self):
+        self.columns = {name: [] for name in PROPERTY_COLUMNS + ["id"]}
+        self.coordinates = []
+
+    def append(self, feat: dict):
+        prop = feat["properties"]
+        for name in PROPERTY_COLUMNS:
+            self.columns[name].append(prop.get(name))
+        self.coordinates.append(feat["geometry"]["coordinates"])
+
+        ids = prop.get("ids")
+        if ids:
+            id_list = ids.strip(",").split(",")
+            self.columns["id"].append(id_list[0] if id_list else None)
+        else:
+            self.columns["id"].append(prop.get("id"))
+
+    def build(self) -> Dict[str, np.ndarray]:
+        """
+        Return one array per column, sorted by date in descending order, or an
+        empty dict when no feature was appended.
+        """
+        if not self.coordinates:
+            return {}
+
+        columns = dict(self.columns)
+        coordinates = np.asarray(self.coordinates, dtype=np.float64)  # [lon, lat, depth]
+        columns["longitude"] = coordinates[:, 0]
+        columns["latitude"] = coordinates[:, 1]
+        columns["depth"] = coordinates[:, 2]
+
+        # Let pandas infer each column's dtype, as it would for a DataFrame.
+        columns = {name: pd.Series(columns[name]).to_numpy() for name in EARTHQUAKE_COLUMNS}
+
+        # Sort on the raw epoch milliseconds (int64), before they become strings.
+        order = np.argsort(-columns["time"], kind="stable")
+        columns = {name: values[order] for name, values in columns.items()}
+        columns["time"] = _format_timestamps(pd.Series(columns["time"])).to_numpy()
+        columns["updated"] = _format_timestamps(pd.Series(columns["updated"])).to_numpy()
+        return columns
+
+
+
+def _concatenate_columns(blocks: List[Dict[str, np.ndarray]]) -> pd.DataFrame:
+    """
+    Stack blocks of columns into a single DataFrame, allocating each column once.
+    Columns missing from a block are filled with NaN, like pd.concat does.
+    """
+    lengths = [len(next(iter(block.values()))) if block else 0 for block in blocks]
+    names = list(dict.fromkeys(name for block in blocks for name in block))
+
+    return pd.DataFrame({
+        name: np.concatenate([
+            block[name] if name in block else np.full(length, np.nan)
+            for block, length in zip(blocks, lengths)
+        ])
+        for name in names
+    })
+
+
+
+_cache_expiry = 0.0
+
+
+
+def _fetch_columns_cached(url: str) -> Dict[str, np.ndarray]:
+    """
+    Memoized _fetch_columns: the whole cache is dropped every
+    CACHE_TTL_SECONDS, so entries never outlive it and stale catalogs
+    (e.g. for end_date=datetime.now()) get refreshed.
+    """
+    global _cache_expiry
+    now = time.monotonic()
+    if now >= _cache_expiry:
+        _fetch_columns.cache_clear()
+        _cache_expiry = now + CACHE_TTL_SECONDS
+    return _fetch_columns(url)
+
+
+
+@functools.lru_cache(maxsize=CACHE_MAX_ENTRIES)
+def _fetch_columns(url: str) -> Dict[str, np.ndarray]:
+    """
+    Download a USGS query and parse it into columns (see _parse_columns).
+
+    With a compiled ijson backend, features are parsed while the body is
+    read, so the whole response is never held in memory. Results are
+    memoized by URL (see _fetch_columns_cached); callers must not modify
+    the returned arrays.
+    """
+    try:
+        with urllib.request.urlopen(url, timeout=15) as response:
+            if ijson is None:
+                return _parse_columns(json_loads(response.read()))
+            columns = _ColumnBuilder()
+            for feat in ijson.items(response, "features.item", use_float=True):
+                columns.append(feat)
+            return columns.build()
+    except urllib.error.HTTPError as exc:
+        # HTTP error
+        raise exc
+    except urllib.error.URLError as exc:
+        # Network errors
+        raise exc
+
+
+
+async def _fetch_columns_async(session: aiohttp.ClientSession, url: str) -> Dict[str, np.ndarray]:
+    """
+    Download a USGS query with the given session and parse it into columns
+    (see _parse_columns), streaming the body through ijson when available.
+    """
+    async with session.get(url) as response:
+        response.raise_for_status()
+        if ijson is None:
+            return _parse_columns(json_loads(await response.read()))
+        columns = _ColumnBuilder()
+        async for feat in ijson.items(response.content, "features.item", use_float=True):
+            columns.append(feat)
+        return columns.build()
+
+
+
 def get_earthquake_data(
     latitude: float,
     longitude: float,
@@ -86,6 +339,12 @@ def get_earthquake_data(
             'magError', 'magNst', 'status', 'locationSource',
             'magSource'
         ]
+
+    Notes
+    -----
+    Results are cached in memory by query URL, for up to CACHE_MAX_ENTRIES
+    queries and CACHE_TTL_SECONDS seconds, so repeated calls for the same
+    asset do not hit the API again within that window.
     """
 
     url = build_api_url(
@@ -95,66 +354,8 @@ def get_earthquake_data(
                 radius=radius,
             )
 
-    try:
-        with urllib.request.urlopen(url, timeout=15) as response:
-            # JSON encoded in UTF‑8
-            raw_bytes = response.read()
-            charset = response.headers.get_content_charset() or "utf-8"
-            raw_text = raw_bytes.decode(charset)
-            data = json.loads(raw_text)
-    except urllib.error.HTTPError as exc:
-        # HTTP error
-        raise exc
-    except urllib.error.URLError as exc:
-        # Network errors
-        raise exc
-
-    records = []
-    for feat in data.get("features", []):
-        prop = feat["properties"]
-        geom = feat["geometry"]["coordinates"]  # [lon, lat, depth]
-
-        ids = prop.get("ids")
-        event_id = None
-
-        if ids:
-            id_list = ids.strip(",").split(",")
-            event_id = id_list[0] if id_list else None
-        else:
-            event_id = prop.get("id")
-
-        record = {
-            "time": pd.to_datetime(prop.get("time"), unit="ms", utc=True).round("ms").strftime("%Y-%m-%dT%H:%M:%S.%fZ")[:-4] + "Z",
-            "latitude": geom[1],
-            "longitude": geom[0],
-            "depth": geom[2],
-            "mag": prop.get("mag"),
-            "magType": prop.get("magType"),
-            "nst": prop.get("nst"),
-            "gap": prop.get("gap"),
-            "dmin": prop.get("dmin"),
-            "rms": prop.get("rms"),
-            "net": prop.get("net"),
-            "id": event_id,
-            "updated": pd.to_datetime(prop.get("updated"), unit="ms", utc=True).round("ms").strftime("%Y-%m-%dT%H:%M:%S.%fZ")[:-4] + "Z"
-                     if prop.get("updated") is not None else np.nan,
-            "place": prop.get("place"),
-            "type": prop.get("type"),
-            "horizontalError": prop.get("horizontalError"),
-            "depthError": prop.get("depthError"),
-            "magError": prop.get("magError"),
-            "magNst": prop.get("magNst"),
-            "status": prop.get("status"),
-            "locationSource": prop.get("locationSource"),
-            "magSource": prop.get("magSource"),
-        }
-        records.append(record)
-
-    earthquake_data = pd.DataFrame.from_records(records)
-
-    if not earthquake_data.empty:
-        earthquake_data = earthquake_data.sort_values("time", ascending=False).reset_index(drop=True)
-    return earthquake_data
+    # The cached columns are shared between calls, hence the copy.
+    return pd.DataFrame(_fetch_columns_cached(url), copy=True)
 
 
 
@@ -164,10 +365,12 @@ async def get_earthquake_data_for_multiple_locations(
     minimum_magnitude: float,
     radius: float,
     max_concurrent_requests: int = 50,
+    tile_size: Optional[float] = None,
 ) -> pd.DataFrame:
     """
-    Async wrapper to query multiple locations concurrently by calling
-    the get_earthquake_data function.
+    Query multiple locations concurrently, with all requests issued
+    asynchronously on a single aiohttp session. Locations resolving to the
+    same query are only fetched once per call; nothing is cached across calls.
 
     Parameters
     ----------
@@ -181,33 +384,66 @@ async def get_earthquake_data_for_multiple_locations(
         Maximum date in YYYY-MM-DD format.
     max_concurrent_requests: int
         max number of requests
+    tile_size: float, optional
+        If given, asset coordinates are snapped to a grid of this size (degrees)
+        before querying, so that nearby assets share a single request.
 
     Returns
     -------
     pd.DataFrame
         Concatenated DataFrame for all locations.
     """
+    if tile_size is not None and not tile_size > 0:
+        raise ValueError("tile_size must be strictly positive")
+
     semaphore = asyncio.Semaphore(max_concurrent_requests)
+    timeout = aiohttp.ClientTimeout(total=15)
 
-    async def fetch(loc: Tuple[float, float]) -> pd.DataFrame:
+    def query_location(loc: Tuple[float, float]) -> Tuple[float, float]:
+        if tile_size is None:
+            return loc
+        return tuple(round(round(coord / tile_size) * tile_size, 6) for coord in loc)
+
+    async def fetch(session: aiohttp.ClientSession, url: str) -> Dict[str, np.ndarray]:
         async with semaphore:
-            loop = asyncio.get_running_loop()
-            try:
-                earthquake_data = await loop.run_in_executor(
-                    None,  
-                    get_earthquake_data,
-                    loc[0], loc[1], radius, minimum_magnitude, end_date
-                )
-                earthquake_data["query_latitude"] = loc[0]
-                earthquake_data["query_longitude"] = loc[1]
-                return earthquake_data
-            except Exception as exc:
-                return pd.DataFrame([{
-                    "error": str(exc),
-                    "query_latitude": loc[0],
-                    "query_longitude": loc[1]
-                }])
-
-    tasks = [fetch(loc) for loc in assets]
-    results = await asyncio.gather(*tasks)
-    return pd.concat(results, ignore_index=True)
\ No newline at end of file
+            return await _fetch_columns_async(session, url)
+
+    locations = list(assets)
+    urls = build_api_urls(
+        assets=[query_location(loc) for loc in locations],
+        endtime=end_date,
+        minimum_magnitude=minimum_magnitude,
+        radius=radius,
+    )
+    unique_urls = list(dict.fromkeys(urls))
+
+    # Keep connections to the API alive across requests instead of
+    # paying a TCP and TLS handshake for each location.
+    connector = aiohttp.TCPConnector(
+        limit=max_concurrent_requests,
+        limit_per_host=max_concurrent_requests,
+        keepalive_timeout=60,
+        ttl_dns_cache=300,
+    )
+    headers = {"Accept-Encoding": "gzip"}
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=headers) as session:
+        tasks = [fetch(session, url) for url in unique_urls]
+        responses = dict(zip(unique_urls, await asyncio.gather(*tasks, return_exceptions=True)))
+
+    # Gather every location's columns first, then build the DataFrame once.
+    blocks = []
+    for loc, url in zip(locations, urls):
+        columns = responses[url]
+        if isinstance(columns, BaseException):
+            if not isinstance(columns, Exception):
+                raise columns
+            columns = {"error": np.array([str(columns) or type(columns).__name__], dtype=object)}
+        n_rows = len(next(iter(columns.values()))) if columns else 0
+        blocks.append({
+            **columns,
+            "query_latitude": np.full(n_rows, loc[0], dtype=np.float64),
+            "query_longitude": np.full(n_rows, loc[1], dtype=np.float64),
+        })
+
+    return _concatenate_columns(blocks)
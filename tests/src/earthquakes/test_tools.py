@@ -1,8 +1,19 @@
 import pytest
 import numpy as np
 import pandas as pd
+from numba import float32
 
-from earthquakes.tools import get_haversine_distance, EARTH_RADIUS
+from earthquakes.tools import (
+    EARTH_RADIUS,
+    HaversineIndex,
+    _event_payouts,
+    _haversine_angle,
+    compute_burning_cost,
+    compute_payouts,
+    get_haversine_distance,
+    get_haversine_within,
+    min_haversine_to_any,
+)
 
 
 def test_haversine_known_distance():
@@ -29,6 +40,179 @@ def test_haversine_array_input():
     np.testing.assert_allclose(distances, expected)
 
 
+def test_haversine_nan_input():
+    distances = get_haversine_distance([np.nan, 10.0], [0.0, 20.0], 0, 0)
+
+    assert np.isnan(distances[0])
+    assert np.isfinite(distances[1])
+
+
+def test_haversine_nan_input_large():
+    lats = np.full(20_000, 10.0)
+    lats[0] = np.nan
+
+    distances = get_haversine_distance(lats, np.full(20_000, 20.0), 0, 0)
+
+    assert np.isnan(distances[0])
+    assert np.isfinite(distances[1:]).all()
+
+
+def test_haversine_float32():
+    lats = np.array([0, 90, 35.025])
+    lons = np.array([0, 0, 25.763])
+
+    distances = get_haversine_distance(lats, lons, 10.0, 20.0, dtype=np.float32)
+
+    assert distances.dtype == np.float32
+    np.testing.assert_allclose(distances, get_haversine_distance(lats, lons, 10.0, 20.0), rtol=1e-4)
+
+
+def test_haversine_angle_float32_stays_float32():
+    point = np.float32(35.025), np.float32(25.763)
+    _haversine_angle(*point, *point)
+
+    signatures = {sig.args: sig.return_type for sig in _haversine_angle.nopython_signatures}
+    assert signatures[(float32,) * 4] == float32
+
+
+def test_haversine_large_input_matches_small():
+    random_state = np.random.RandomState(0)
+    lats = random_state.uniform(-90, 90, 20_000)
+    lons = random_state.uniform(-180, 180, 20_000)
+
+    distances = get_haversine_distance(lats, lons, 35.025, 25.763)
+
+    expected = np.concatenate([
+        get_haversine_distance(lats[i:i + 5_000], lons[i:i + 5_000], 35.025, 25.763)
+        for i in range(0, 20_000, 5_000)
+    ])
+    np.testing.assert_allclose(distances, expected)
+
+
+def test_haversine_large_input_broadcast_reference():
+    random_state = np.random.RandomState(0)
+    lats = random_state.uniform(-90, 90, 20_000)
+    lons = random_state.uniform(-180, 180, 20_000)
+    ref_lons = random_state.uniform(-180, 180, 20_000)
+
+    distances = get_haversine_distance(lats, lons, 35.025, ref_lons)
+
+    expected = np.concatenate([
+        get_haversine_distance(lats[i:i + 5_000], lons[i:i + 5_000], 35.025, ref_lons[i:i + 5_000])
+        for i in range(0, 20_000, 5_000)
+    ])
+    np.testing.assert_allclose(distances, expected)
+
+
 def test_haversine_invalid_input():
     with pytest.raises(ValueError):
-        get_haversine_distance(['a', 'b'], ['c', 'd'], 0, 0)
\ No newline at end of file
+        get_haversine_distance(['a', 'b'], ['c', 'd'], 0, 0)
+
+
+def test_haversine_within():
+    lats = np.array([0, 90, 0.05, np.nan])
+    lons = np.array([0, 0, 0.05, 0])
+
+    within = get_haversine_within(lats, lons, 0, 0, max_radius_km=10)
+
+    np.testing.assert_array_equal(within, [True, False, True, False])
+
+
+def test_haversine_within_nan_any_radius():
+    within = get_haversine_within([np.nan, 0], [0, np.nan], 0, 0, max_radius_km=30_000)
+
+    np.testing.assert_array_equal(within, [False, False])
+
+
+def test_min_haversine_to_any():
+    lats = np.array([0, 90, 45])
+    lons = np.array([0, 0, 0])
+
+    distances = min_haversine_to_any(lats, lons, refs_lat=[0, 90], refs_lon=[0, 0])
+
+    expected = np.array([0, 0, np.pi/4 * EARTH_RADIUS])
+    np.testing.assert_allclose(distances, expected, atol=1e-9)
+
+
+def test_min_haversine_to_any_nan():
+    distances = min_haversine_to_any([0, np.nan], [0, 0], refs_lat=[np.nan, 0], refs_lon=[0, 0])
+
+    assert distances[0] == pytest.approx(0)
+    assert np.isnan(distances[1])
+
+
+def test_haversine_index_matches_distance():
+    lats = np.array([0, 90, 35.025])
+    lons = np.array([0, 0, 25.763])
+    index = HaversineIndex(lats, lons)
+
+    for ref_lat, ref_lon in [(0, 0), (51.5074, -0.1278)]:
+        np.testing.assert_allclose(
+            index.distance_to(ref_lat, ref_lon),
+            get_haversine_distance(lats, lons, ref_lat, ref_lon),
+        )
+
+
+def test_compute_payouts_yearly_max():
+    earthquake_data = pd.DataFrame({
+        "time": ["2000-01-01", "2000-06-01", "2001-03-01", "2002-03-01"],
+        "mag": [4.6, 6.6, 5.6, 4.0],
+        "distance": [5.0, 150.0, 40.0, 5.0],
+    })
+    payout_rules = [
+        {"radius": 10, "magnitude": 4.5, "payout": 100},
+        {"radius": 50, "magnitude": 5.5, "payout": 75},
+        {"radius": 200, "magnitude": 6.5, "payout": 50},
+    ]
+
+    payouts = compute_payouts(earthquake_data, payout_rules)
+
+    assert payouts == {2000: 100.0, 2001: 75.0, 2002: 0.0}
+
+
+def test_event_payouts_kernel():
+    distances = np.array([5.0, 40.0, 150.0, 5.0, 5.0, 500.0])
+    magnitudes = np.array([7.0, 5.6, 6.6, 4.0, np.nan, 9.0])
+    # Sorted by decreasing payout, as compute_payouts passes them.
+    radii = np.array([10.0, 50.0, 200.0])
+    min_magnitudes = np.array([4.5, 5.5, 6.5])
+    rule_payouts = np.array([100.0, 75.0, 50.0])
+
+    out = np.empty(distances.shape, dtype=np.float64)
+    _event_payouts(distances, magnitudes, radii, min_magnitudes, rule_payouts, out)
+
+    np.testing.assert_array_equal(out, [100.0, 75.0, 50.0, 0.0, 0.0, 0.0])
+
+
+def test_compute_payouts_unsorted_overlapping_rules():
+    earthquake_data = pd.DataFrame({
+        "time": ["2000-01-01", "2001-01-01", "2002-01-01", "2003-01-01"],
+        "mag": [6.5, 5.5, 7.0, 3.9],
+        "distance": [30.0, 80.0, 150.0, 30.0],
+    })
+    # Low payouts listed first: every event matching a later rule also matches an earlier one.
+    payout_rules = [
+        {"radius": 200, "magnitude": 4.0, "payout": 20},
+        {"radius": 100, "magnitude": 5.0, "payout": 60},
+        {"radius": 50, "magnitude": 6.0, "payout": 90},
+    ]
+
+    payouts = compute_payouts(earthquake_data, payout_rules)
+
+    assert payouts == {2000: 90.0, 2001: 60.0, 2002: 20.0, 2003: 0.0}
+
+
+@pytest.mark.parametrize(
+    "payouts",
+    [
+        {2000: 100.0, 2002: 50.0, 2010: 75.0},
+        (np.array([100.0, 0.0, 50.0]), 2000),
+    ],
+)
+def test_compute_burning_cost(payouts):
+    assert compute_burning_cost(payouts, start_year=1999, end_year=2002) == 37.5
+
+
+def test_compute_burning_cost_invalid_period():
+    with pytest.raises(ValueError):
+        compute_burning_cost({2000: 100.0}, start_year=2001, end_year=2000)
\ No newline at end of file
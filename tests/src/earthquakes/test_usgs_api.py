@@ -1,7 +1,22 @@
+import asyncio
+import io
+import json
+
 import pytest
+import numpy as np
+import pandas as pd
 from datetime import datetime, timedelta
 
-from earthquakes.usgs_api import build_api_url
+from earthquakes import usgs_api
+from earthquakes.usgs_api import (
+    _ColumnBuilder,
+    _concatenate_columns,
+    _parse_features,
+    build_api_url,
+    build_api_urls,
+    get_earthquake_data,
+    get_earthquake_data_for_multiple_locations,
+)
 
 
 def test_build_api_url_exact_match():
@@ -44,4 +59,147 @@ def test_build_api_url_various_inputs(assets, minimum_magnitude, radius):
     assert f"latitude={lat}" in result
     assert f"longitude={lon}" in result
     assert f"minmagnitude={minimum_magnitude}" in result
-    assert f"maxradiuskm={radius}" in result
\ No newline at end of file
+    assert f"maxradiuskm={radius}" in result
+
+
+def test_build_api_urls_matches_single():
+    assets = [(10.0, 20.0), (-45.123, 179.999)]
+    endtime = datetime(2019, 2, 2)
+
+    result = build_api_urls(assets, endtime, 5.0, 50)
+
+    assert result == [build_api_url(loc, endtime, 5.0, 50) for loc in assets]
+
+
+def _feature(time, lon, lat, depth, ids, updated=None, mag=5.0):
+    return {
+        "properties": {
+            "time": time, "mag": mag, "magType": "mb", "net": "us",
+            "ids": ids, "updated": updated, "status": "reviewed",
+        },
+        "geometry": {"coordinates": [lon, lat, depth]},
+    }
+
+
+def test_parse_features():
+    data = {"features": [
+        _feature(1632804488650, 25.2018, 35.0817, 10.0, ",us7000ff36,at2021xyz,"),
+        _feature(1634030645099, 26.2152, 35.1691, 20.0, ",us6000ftxu,", updated=1691847154542),
+    ]}
+
+    earthquake_data = _parse_features(data)
+
+    assert list(earthquake_data["time"]) == ["2021-10-12T09:24:05.099Z", "2021-09-28T04:48:08.650Z"]
+    assert list(earthquake_data["id"]) == ["us6000ftxu", "us7000ff36"]
+    assert list(earthquake_data["latitude"]) == [35.1691, 35.0817]
+    assert list(earthquake_data["longitude"]) == [26.2152, 25.2018]
+    assert list(earthquake_data["depth"]) == [20.0, 10.0]
+    assert earthquake_data["updated"].iloc[0] == "2023-08-12T13:32:34.542Z"
+    assert pd.isna(earthquake_data["updated"].iloc[1])
+    assert list(earthquake_data.columns[:4]) == ["time", "latitude", "longitude", "depth"]
+
+
+def test_parse_features_empty():
+    assert _parse_features({"features": []}).empty
+
+
+def test_streamed_features_match_parsed():
+    ijson = pytest.importorskip("ijson")
+    data = {"features": [
+        _feature(1632804488650, 25.2018, 35.0817, 10.0, ",us7000ff36,"),
+        _feature(1634030645099, 26.2152, 35.1691, 20.0, ",us6000ftxu,", updated=1691847154542, mag=6.4),
+    ]}
+
+    columns = _ColumnBuilder()
+    for feat in ijson.items(io.BytesIO(json.dumps(data).encode()), "features.item", use_float=True):
+        columns.append(feat)
+
+    pd.testing.assert_frame_equal(pd.DataFrame(columns.build()), _parse_features(data))
+
+
+def test_concatenate_columns_matches_concat():
+    blocks = [
+        {"mag": np.array([5.0, 4.5]), "query_latitude": np.array([1.0, 1.0])},
+        {"error": np.array(["timeout"], dtype=object), "query_latitude": np.array([2.0])},
+    ]
+
+    result = _concatenate_columns(blocks)
+
+    expected = pd.concat([pd.DataFrame(block) for block in blocks], ignore_index=True)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_multiple_locations_coalesces_queries(monkeypatch):
+    fetched_urls = []
+
+    async def fake_fetch_columns(session, url):
+        fetched_urls.append(url)
+        if "latitude=40.0" in url:
+            raise asyncio.TimeoutError()
+        return {"mag": np.array([5.0])}
+
+    monkeypatch.setattr(usgs_api, "_fetch_columns_async", fake_fetch_columns)
+    assets = [(35.001, 25.004), (35.0, 25.0), (35.001, 25.004), (40.0, 20.0), (40.002, 20.001)]
+
+    result = asyncio.run(get_earthquake_data_for_multiple_locations(
+        assets, datetime(2021, 10, 21), 4.5, 200, tile_size=0.01,
+    ))
+
+    assert sorted(fetched_urls) == sorted(build_api_urls([(35.0, 25.0), (40.0, 20.0)], datetime(2021, 10, 21), 4.5, 200))
+    assert list(result["query_latitude"]) == [lat for lat, _ in assets]
+    assert list(result["query_longitude"]) == [lon for _, lon in assets]
+    assert list(result["mag"][:3]) == [5.0, 5.0, 5.0]
+    assert result["mag"][3:].isna().all()
+    assert result["error"][:3].isna().all()
+    assert list(result["error"][3:]) == ["TimeoutError", "TimeoutError"]
+
+
+def test_multiple_locations_deduplicates_without_tiles(monkeypatch):
+    fetched_urls = []
+
+    async def fake_fetch_columns(session, url):
+        fetched_urls.append(url)
+        return {}
+
+    monkeypatch.setattr(usgs_api, "_fetch_columns_async", fake_fetch_columns)
+    assets = [(35.001, 25.004), (35.0, 25.0), (35.001, 25.004)]
+
+    result = asyncio.run(get_earthquake_data_for_multiple_locations(assets, datetime(2021, 10, 21), 4.5, 200))
+
+    assert len(fetched_urls) == 2
+    assert result.empty
+
+
+@pytest.mark.parametrize("tile_size", [0, -0.01])
+def test_multiple_locations_invalid_tile_size(tile_size):
+    with pytest.raises(ValueError):
+        asyncio.run(get_earthquake_data_for_multiple_locations(
+            [(35.0, 25.0)], datetime(2021, 10, 21), 4.5, 200, tile_size=tile_size,
+        ))
+
+
+def test_get_earthquake_data_cache_expires(monkeypatch):
+    urls = []
+    body = json.dumps({"features": [_feature(1634030645099, 26.2152, 35.1691, 20.0, ",us6000ftxu,")]}).encode()
+
+    def fake_urlopen(url, timeout):
+        urls.append(url)
+        return io.BytesIO(body)
+
+    clock = [1000.0]
+    monkeypatch.setattr(usgs_api.urllib.request, "urlopen", fake_urlopen)
+    monkeypatch.setattr(usgs_api.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(usgs_api, "_cache_expiry", 0.0)
+    query = dict(latitude=35.0, longitude=25.0, radius=200, minimum_magnitude=4.5, end_date=datetime(2021, 10, 21))
+
+    first = get_earthquake_data(**query)
+    first["mag"] = 0.0
+    second = get_earthquake_data(**query)
+    assert len(urls) == 1
+    assert list(second["mag"]) == [5.0]
+
+    clock[0] += usgs_api.CACHE_TTL_SECONDS
+    get_earthquake_data(**query)
+    assert len(urls) == 2
+
+    usgs_api._fetch_columns.cache_clear()
\ No newline at end of file